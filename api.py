@@ -5,35 +5,48 @@ Otimizado para Render Free Tier (Web Service apenas, sem workers).
 """
 
 import io
+import os
+import asyncio
 import sys
+import time
 import zipfile
+import threading
 import traceback
 import logging
 from pathlib import Path
 from typing import Optional
+from contextlib import asynccontextmanager, contextmanager
 from datetime import datetime
 
+# Fallback para medir o startup quando /proc não está disponível (ver _process_age_s)
+_IMPORT_STARTED_AT = time.perf_counter()
+
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException
 from fastapi.responses import StreamingResponse, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 import tempfile
 import shutil
 
-# Configurar logging detalhado
+# Nível de log configurável (DEBUG global deixa o cold start mais lento)
 logging.basicConfig(
-    level=logging.DEBUG,
+    level=os.environ.get("LOG_LEVEL", "INFO").upper(),
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
 
-# Adiciona o diretório atual ao path para importar screenshot_pdf
-sys.path.insert(0, str(Path(__file__).parent))
-
-# Importa funções do script principal
+# Importa funções do script principal (leve: o Playwright só é carregado
+# quando um navegador é de fato aberto)
 try:
     from screenshot_pdf import (
         read_urls_from_file,
-        capture_many,
+        capture_with_profile,
+        compile_profile,
+        apply_profile_overrides,
+        load_render_profiles,
+        get_render_profile,
+        list_render_profiles,
+        warm_up_browser,
+        PROFILE_DEFAULTS,
         _parse_headers,
     )
     logger.info("✅ Módulo screenshot_pdf importado com sucesso")
@@ -42,14 +55,171 @@ except Exception as e:
     logger.error(traceback.format_exc())
     raise
 
+# Navegador compartilhado (ver `python screenshot_pdf.py --serve-browser`): com
+# BROWSER_ENDPOINT definido, todos os workers do uvicorn usam o mesmo Chromium
+BROWSER_ENDPOINT = os.environ.get("BROWSER_ENDPOINT") or None
+# Fallback do limite de páginas, usado só quando o navegador não foi iniciado por
+# --serve-browser nesta máquina (nesse caso vale o limite definido por ele)
+MAX_BROWSER_PAGES = int(os.environ.get("MAX_BROWSER_PAGES", "4"))
+# Espera máxima por uma vaga no navegador compartilhado antes de responder 503
+PAGE_SLOT_TIMEOUT_S = float(os.environ.get("PAGE_SLOT_TIMEOUT_S", "60"))
+
+# Perfis de renderização nomeados (ver render_profiles.json), compilados no startup
+# e referenciados pelo campo "profile" de /api/process-batch
+RENDER_PROFILES_FILE = os.environ.get("RENDER_PROFILES_FILE") or None
+# Opções dos lotes sem perfil (diferentes da CLI: sem User-Agent customizado e
+# Accept-Language curto). Perfis nomeados não usam estes valores.
+API_PROFILE_DEFAULTS: dict = {
+    **PROFILE_DEFAULTS,
+    "user_agent": None,
+    "accept_language": "pt-BR,pt;q=0.9",
+}
+_API_DEFAULT_PROFILE = compile_profile(API_PROFILE_DEFAULTS)
+
+# (mtime_ns, perfis compilados); substituído de uma vez para leitura sem lock
+_render_profiles: dict = {"entry": (None, {})}
+_render_profiles_lock = threading.Lock()
+
+# Sem nenhum request, o aquecimento começa após este atraso (segundos)
+BROWSER_WARMUP_DELAY_S = float(os.environ.get("BROWSER_WARMUP_DELAY_S", "10"))
+
+# Estado do startup, preenchido pelo lifespan e pela thread de aquecimento
+_startup_state: dict = {
+    "startup_ms": None,
+    "startup_measured_from": None,
+    "browser_warm": False,
+    "warmup_ms": None,
+    "warmup_error": None,
+}
+
+# Sinalizado pelo primeiro health check (/ ou /health): a partir daí o servidor
+# certamente está escutando
+_serving: dict = {"event": None}
+
+# Aquecimento e capturas não abrem Chromium ao mesmo tempo (pico de memória no free
+# tier): o aquecimento é pulado se já há captura, e a captura espera o aquecimento em curso
+_capture_state_lock = threading.Lock()
+_captures_in_flight: dict = {"count": 0}
+_warm_up_gate = threading.Lock()
+
+
+def _process_age_s() -> Optional[float]:
+    """Idade do processo em segundos, lida de /proc (Linux); None se indisponível."""
+    try:
+        with open("/proc/self/stat") as f:
+            # Campo 22 (starttime, em ticks desde o boot); o nome do processo pode conter espaços
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime_s = float(f.read().split()[0])
+        return uptime_s - start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def _current_render_profiles() -> dict:
+    """Perfis compilados; recompila só quando o mtime do arquivo muda (um stat por chamada).
+
+    Erros do arquivo levantam OSError ou ValueError (configuração do servidor).
+    """
+    mtime_ns = os.stat(RENDER_PROFILES_FILE).st_mtime_ns
+    cached_mtime_ns, profiles = _render_profiles["entry"]
+    if mtime_ns != cached_mtime_ns:
+        with _render_profiles_lock:
+            cached_mtime_ns, profiles = _render_profiles["entry"]
+            if mtime_ns != cached_mtime_ns:
+                profiles = load_render_profiles(Path(RENDER_PROFILES_FILE))
+                _render_profiles["entry"] = (mtime_ns, profiles)
+                logger.info(f"🎛️ {len(profiles)} perfis de renderização compilados de {RENDER_PROFILES_FILE}")
+    return profiles
+
+
+def _mark_serving() -> None:
+    if _serving["event"] is not None:
+        _serving["event"].set()
+
+
+@contextmanager
+def _capture_in_flight():
+    """Registra uma captura em andamento, esperando um aquecimento que já tenha começado."""
+    with _capture_state_lock:
+        _captures_in_flight["count"] += 1
+    try:
+        with _warm_up_gate:
+            pass
+        yield
+    finally:
+        with _capture_state_lock:
+            _captures_in_flight["count"] -= 1
+
+
+def _warm_up_in_background() -> None:
+    """Importa o Playwright e abre/fecha o Chromium uma vez.
+
+    O navegador não fica aberto: o ganho é o import do playwright já feito e os
+    binários do Chromium no page cache do SO, o que encurta o primeiro launch real.
+    """
+    with _capture_state_lock:
+        if _captures_in_flight["count"] > 0 or not _warm_up_gate.acquire(blocking=False):
+            logger.info("⏭️ Aquecimento pulado: captura já em andamento")
+            return
+    try:
+        elapsed = warm_up_browser(headless=True, browser_endpoint=BROWSER_ENDPOINT)
+        _startup_state["warmup_ms"] = round(elapsed * 1000, 1)
+        _startup_state["browser_warm"] = True
+        logger.info(f"🔥 Navegador aquecido em {elapsed:.2f}s")
+    except Exception as e:
+        _startup_state["warmup_error"] = str(e)
+        logger.warning(f"⚠️ Falha ao aquecer navegador: {e}")
+    finally:
+        _warm_up_gate.release()
+
+
+async def _warm_up_when_serving() -> None:
+    """Adia o aquecimento até o primeiro health check (ou até o atraso expirar)."""
+    try:
+        await asyncio.wait_for(_serving["event"].wait(), timeout=BROWSER_WARMUP_DELAY_S)
+    except asyncio.TimeoutError:
+        pass
+    threading.Thread(target=_warm_up_in_background, name="browser-warmup", daemon=True).start()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    age_s = _process_age_s()
+    if age_s is not None:
+        _startup_state["startup_ms"] = round(age_s * 1000, 1)
+        _startup_state["startup_measured_from"] = "process"
+    else:
+        _startup_state["startup_ms"] = round((time.perf_counter() - _IMPORT_STARTED_AT) * 1000, 1)
+        _startup_state["startup_measured_from"] = "import"
+    logger.info(f"⏱️ Startup em {_startup_state['startup_ms']}ms (desde {_startup_state['startup_measured_from']})")
+    _serving["event"] = asyncio.Event()
+    if RENDER_PROFILES_FILE:
+        try:
+            _current_render_profiles()
+        except (OSError, ValueError) as e:
+            logger.error(f"❌ Erro ao ler perfis ({RENDER_PROFILES_FILE}): {e}")
+    warm_up_task = None
+    # O uvicorn só abre o socket depois do lifespan; o aquecimento fica para depois,
+    # sem competir com o boot nem com os primeiros health checks
+    if os.environ.get("BROWSER_WARMUP", "1") != "0":
+        warm_up_task = asyncio.create_task(_warm_up_when_serving())
+    yield
+    if warm_up_task is not None:
+        warm_up_task.cancel()
+
+
 app = FastAPI(
     title="Screenshot & PDF Generator API",
     description="Processa screenshots e PDFs em lotes para Render Free Tier",
     version="2.0.0",
+    lifespan=lifespan,
 )
 
+
 @app.get("/")
-def health_check():
+async def health_check():
+    _mark_serving()
     return {
         "status": "ok",
         "service": "Screenshot & PDF Generator API (Batch Mode)",
@@ -70,6 +240,7 @@ app.add_middleware(
 @app.get("/")
 async def root():
     """Health check endpoint"""
+    _mark_serving()
     return {
         "status": "ok",
         "service": "Screenshot & PDF Generator API (Batch Mode)",
@@ -82,11 +253,12 @@ async def root():
 def process_batch(
     urls: str = Form(...),  # URLs separadas por newline
     batch_number: int = Form(0),
-    viewport_width: int = Form(1280),
-    viewport_height: int = Form(800),
-    pdf_format: str = Form("A4"),
-    landscape: bool = Form(False),
+    viewport_width: Optional[int] = Form(None),
+    viewport_height: Optional[int] = Form(None),
+    pdf_format: Optional[str] = Form(None),
+    landscape: Optional[bool] = Form(None),
     delimiter: str = Form(";"),
+    profile: Optional[str] = Form(None),
 ):
     """
     Processa um lote de URLs (máximo 20) e retorna ZIP.
@@ -95,11 +267,13 @@ def process_batch(
     Args:
         urls: URLs separadas por newline (máximo 20)
         batch_number: Número do lote (para nomeação)
-        viewport_width: Largura do viewport
-        viewport_height: Altura do viewport
-        pdf_format: Formato do PDF (A4, Letter, etc)
-        landscape: Orientação paisagem
+        viewport_width: Largura do viewport (default: 1280 ou a do perfil)
+        viewport_height: Altura do viewport (default: 800 ou a do perfil)
+        pdf_format: Formato do PDF (A4, Letter, etc; default: A4 ou o do perfil)
+        landscape: Orientação paisagem (default: false ou a do perfil)
         delimiter: Delimitador do CSV (se vier de CSV)
+        profile: Id de um perfil de renderização; viewport/PDF/landscape
+            informados explicitamente sobrescrevem o perfil
     
     Returns:
         ZIP file com screenshots e PDFs organizados por tipo
@@ -124,6 +298,30 @@ def process_batch(
             logger.error("❌ Nenhuma URL fornecida")
             raise HTTPException(status_code=400, detail="Nenhuma URL fornecida")
         
+        render_profile = _API_DEFAULT_PROFILE
+        if profile:
+            if not RENDER_PROFILES_FILE:
+                raise HTTPException(status_code=400, detail="Perfis não configurados (RENDER_PROFILES_FILE)")
+            try:
+                render_profile = get_render_profile(_current_render_profiles(), profile)
+            except LookupError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            except (OSError, ValueError) as e:
+                # Arquivo ausente ou inválido é erro de configuração do servidor, não do cliente
+                logger.error(f"❌ Erro ao ler perfis ({RENDER_PROFILES_FILE}): {e}")
+                return JSONResponse(status_code=500, content={"error": f"Erro ao ler perfis: {e}"})
+            logger.info(f"🎛️ Usando perfil de renderização '{profile}'")
+        # Campos informados no form sobrescrevem o perfil (ou os defaults da API)
+        try:
+            render_profile = apply_profile_overrides(render_profile, {
+                "viewport_width": viewport_width,
+                "viewport_height": viewport_height,
+                "pdf_format": pdf_format,
+                "landscape": landscape,
+            })
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
         # Cria diretório temporário
         temp_dir = Path(tempfile.mkdtemp())
         output_dir = temp_dir / "output"
@@ -163,25 +361,16 @@ def process_batch(
         base_prefix = f"lote{batch_number:02d}"
         logger.info(f"🚀 Iniciando processamento de {len(urls_with_type)} URLs...")
         
-        results = capture_many(
-            urls=urls_with_type,
-            output_dir=output_dir,
-            base_prefix=base_prefix,
-            viewport_width=viewport_width,
-            viewport_height=viewport_height,
-            wait_until="networkidle",
-            timeout_ms=30000,
-            pdf_format=pdf_format,
-            landscape=landscape,
-            scale=1.0,
-            user_agent=None,
-            accept_language="pt-BR,pt;q=0.9",
-            timezone_id="America/Sao_Paulo",
-            extra_headers={},
-            headless=True,
-            proxy=None,
-            post_wait_ms=0,
-        )
+        with _capture_in_flight():
+            results = capture_with_profile(
+                urls_with_type,
+                output_dir,
+                base_prefix,
+                render_profile,
+                browser_endpoint=BROWSER_ENDPOINT,
+                max_pages=MAX_BROWSER_PAGES,
+                slot_timeout_s=PAGE_SLOT_TIMEOUT_S,
+            )
         
         logger.info(f"✅ Processamento concluído: {len(results)} URLs processadas")
         
@@ -221,6 +410,15 @@ def process_batch(
     
     except HTTPException:
         raise
+    except TimeoutError as e:
+        # Navegador compartilhado sem vagas: cliente pode tentar de novo mais tarde
+        logger.warning(f"⏳ Sem vaga no navegador compartilhado: {e}")
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        return JSONResponse(
+            status_code=503,
+            content={"error": str(e)},
+            headers={"Retry-After": "30"},
+        )
     except Exception as e:
         # Limpa em caso de erro
         logger.error(f"❌ ERRO FATAL no processamento: {e}")
@@ -273,10 +471,23 @@ def process_csv_preview(
         raise HTTPException(status_code=400, detail=f"Erro ao ler CSV: {str(e)}")
 
 
+@app.get("/api/profiles")
+def profiles():
+    """Lista os perfis de renderização e suas opções (proxy e valores de headers mascarados)"""
+    if not RENDER_PROFILES_FILE:
+        return {"profiles": {}}
+    try:
+        return {"profiles": list_render_profiles(_current_render_profiles())}
+    except (OSError, ValueError) as e:
+        logger.error(f"❌ Erro ao ler perfis ({RENDER_PROFILES_FILE}): {e}")
+        raise HTTPException(status_code=500, detail=f"Erro ao ler perfis: {str(e)}")
+
+
 @app.get("/health")
 async def health():
-    """Health check para Render"""
-    return {"status": "healthy"}
+    """Health check para Render (inclui métricas de startup)"""
+    _mark_serving()
+    return {"status": "healthy", **_startup_state}
 
 
 if __name__ == "__main__":
@@ -1,12 +1,52 @@
 #!/usr/bin/env python3
 
 import argparse
+import json
 import sys
+import tempfile
+import time
+from contextlib import contextmanager, nullcontext
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from types import MappingProxyType
+from typing import Mapping, Optional
 
-from playwright.sync_api import sync_playwright
+# Playwright é importado sob demanda (ver _sync_playwright) para que importar
+# este módulo, por exemplo a partir do api.py, não pague o custo do driver.
+
+WAIT_UNTIL_CHOICES = ["load", "domcontentloaded", "networkidle", "commit"]
+PDF_FORMATS = ["Letter", "Legal", "Tabloid", "Ledger", "A0", "A1", "A2", "A3", "A4", "A5", "A6"]
+DEFAULT_USER_AGENT = (
+	"Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
+	"AppleWebKit/537.36 (KHTML, like Gecko) "
+	"Chrome/124.0.0.0 Safari/537.36"
+)
+DEFAULT_ACCEPT_LANGUAGE = "pt-BR,pt;q=0.9,en-US;q=0.8,en;q=0.7"
+
+# Opções aceitas em um perfil de renderização e seus defaults (os mesmos da CLI)
+PROFILE_DEFAULTS: dict = {
+	"viewport_width": 1280,
+	"viewport_height": 800,
+	"wait_until": "networkidle",
+	"timeout_ms": 30000,
+	"pdf_format": "A4",
+	"landscape": False,
+	"scale": 1.0,
+	"user_agent": DEFAULT_USER_AGENT,
+	"accept_language": DEFAULT_ACCEPT_LANGUAGE,
+	"timezone_id": "America/Sao_Paulo",
+	"headers": {},
+	"headless": True,
+	"proxy": None,
+	"post_wait_ms": 0,
+}
+
+# Scripts simples para reduzir detecção automatizada
+_STEALTH_INIT_SCRIPT = """
+Object.defineProperty(navigator, 'webdriver', { get: () => undefined });
+Object.defineProperty(navigator, 'languages', { get: () => ['pt-BR','pt','en-US','en'] });
+Object.defineProperty(navigator, 'plugins', { get: () => [1,2,3,4,5] });
+"""
 
 
 def parse_args() -> argparse.Namespace:
@@ -66,7 +106,7 @@ def parse_args() -> argparse.Namespace:
 	parser.add_argument(
 		"--wait-until",
 		dest="wait_until",
-		choices=["load", "domcontentloaded", "networkidle", "commit"],
+		choices=WAIT_UNTIL_CHOICES,
 		default="networkidle",
 		help="Espera pela navegação (default: networkidle)",
 	)
@@ -80,19 +120,7 @@ def parse_args() -> argparse.Namespace:
 	parser.add_argument(
 		"--pdf-format",
 		dest="pdf_format",
-		choices=[
-			"Letter",
-			"Legal",
-			"Tabloid",
-			"Ledger",
-			"A0",
-			"A1",
-			"A2",
-			"A3",
-			"A4",
-			"A5",
-			"A6",
-		],
+		choices=PDF_FORMATS,
 		default="A4",
 		help="Formato do PDF (default: A4)",
 	)
@@ -113,18 +141,14 @@ def parse_args() -> argparse.Namespace:
 		"--user-agent",
 		dest="user_agent",
 		type=str,
-		default=(
-			"Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
-			"AppleWebKit/537.36 (KHTML, like Gecko) "
-			"Chrome/124.0.0.0 Safari/537.36"
-		),
+		default=DEFAULT_USER_AGENT,
 		help="User-Agent customizado (default: Chrome estável)",
 	)
 	parser.add_argument(
 		"--accept-language",
 		dest="accept_language",
 		type=str,
-		default="pt-BR,pt;q=0.9,en-US;q=0.8,en;q=0.7",
+		default=DEFAULT_ACCEPT_LANGUAGE,
 		help="Header Accept-Language (default: pt-BR,pt;q=0.9,en-US;q=0.8,en;q=0.7)",
 	)
 	parser.add_argument(
@@ -160,6 +184,59 @@ def parse_args() -> argparse.Namespace:
 		default=0,
 		help="Espera extra após navegação antes de capturar (ms)",
 	)
+	# Modo navegador compartilhado
+	parser.add_argument(
+		"--serve-browser",
+		dest="serve_browser",
+		action="store_true",
+		help="Inicia um Chromium de longa duração exposto via CDP em --browser-port e aguarda (Ctrl+C encerra)",
+	)
+	parser.add_argument(
+		"--browser-port",
+		dest="browser_port",
+		type=int,
+		default=9222,
+		help="Porta do endpoint CDP usada por --serve-browser (default: 9222)",
+	)
+	parser.add_argument(
+		"--browser-endpoint",
+		dest="browser_endpoint",
+		type=str,
+		default=None,
+		help="Conecta a um navegador já iniciado (ex.: http://127.0.0.1:9222) em vez de abrir um próprio",
+	)
+	parser.add_argument(
+		"--max-pages",
+		dest="max_pages",
+		type=int,
+		default=4,
+		help=(
+			"Máximo de páginas abertas ao mesmo tempo no navegador compartilhado, somando todos os processos (default: 4). "
+			"Definido por --serve-browser; clientes só usam este valor se o navegador não foi iniciado por --serve-browser nesta máquina"
+		),
+	)
+	parser.add_argument(
+		"--slot-timeout-s",
+		dest="slot_timeout_s",
+		type=float,
+		default=None,
+		help="Tempo máximo de espera por uma vaga no navegador compartilhado, em segundos (default: sem limite)",
+	)
+	# Perfis de renderização
+	parser.add_argument(
+		"--profiles-file",
+		dest="profiles_file",
+		type=Path,
+		default=None,
+		help="Arquivo de perfis de renderização (JSON ou YAML: id -> opções)",
+	)
+	parser.add_argument(
+		"--profile",
+		dest="profile",
+		type=str,
+		default=None,
+		help="Id do perfil em --profiles-file; substitui as opções de viewport, PDF, headers etc.",
+	)
 	return parser.parse_args()
 
 
@@ -327,96 +404,472 @@ def _locale_from_accept_language(accept_language: Optional[str]) -> Optional[str
 	return first or None
 
 
-def capture_many(urls: list[tuple[str, Optional[str]]], output_dir: Path, base_prefix: str, viewport_width: int, viewport_height: int, wait_until: str, timeout_ms: int, pdf_format: str, landscape: bool, scale: float, user_agent: Optional[str], accept_language: Optional[str], timezone_id: Optional[str], extra_headers: dict[str, str], headless: bool, proxy: Optional[str], post_wait_ms: int) -> list[tuple[str, Path, Path]]:
-	"""Captura screenshots e PDFs de múltiplas URLs, organizando por tipo (plataforma/aplicativo) se especificado"""
+def _freeze(value):
+	if isinstance(value, dict):
+		return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+	return value
+
+
+def _thaw(value):
+	if isinstance(value, Mapping):
+		return {k: _thaw(v) for k, v in value.items()}
+	return value
+
+
+def compile_render_options(viewport_width: int, viewport_height: int, wait_until: str, timeout_ms: int, pdf_format: str, landscape: bool, scale: float, user_agent: Optional[str], accept_language: Optional[str], timezone_id: Optional[str], extra_headers: dict[str, str], headless: bool, proxy: Optional[str], post_wait_ms: int) -> Mapping:
+	"""Converte as opções de captura nos kwargs prontos para o Playwright (ver capture_with_profile).
+
+	O resultado é somente leitura, pois pode ser compartilhado entre requests.
+	"""
+	# Headers padrão + extras
+	headers = dict(extra_headers)
+	if accept_language:
+		headers.setdefault("Accept-Language", accept_language)
+	return _freeze({
+		"options": {
+			"viewport_width": viewport_width,
+			"viewport_height": viewport_height,
+			"wait_until": wait_until,
+			"timeout_ms": timeout_ms,
+			"pdf_format": pdf_format,
+			"landscape": landscape,
+			"scale": scale,
+			"user_agent": user_agent,
+			"accept_language": accept_language,
+			"timezone_id": timezone_id,
+			"headers": dict(extra_headers),
+			"headless": headless,
+			"proxy": proxy,
+			"post_wait_ms": post_wait_ms,
+		},
+		"headless": headless,
+		"proxy": proxy,
+		"context_options": {
+			"viewport": {"width": viewport_width, "height": viewport_height},
+			"device_scale_factor": 1,
+			"user_agent": user_agent,
+			"locale": _locale_from_accept_language(accept_language),
+			"timezone_id": timezone_id,
+			"extra_http_headers": headers or None,
+		},
+		"capture": {
+			"wait_until": wait_until,
+			"timeout_ms": timeout_ms,
+			"pdf_format": pdf_format,
+			"landscape": landscape,
+			"scale": scale,
+			"post_wait_ms": post_wait_ms,
+		},
+	})
+
+
+def _validate_profile_headers(headers) -> dict[str, str]:
+	"""Aceita objeto {Nome: Valor} ou lista 'Nome: Valor'; entradas malformadas são rejeitadas."""
+	if isinstance(headers, list):
+		result: dict[str, str] = {}
+		for item in headers:
+			parts = item.split(":", 1) if isinstance(item, str) else []
+			if len(parts) != 2 or not parts[0].strip() or not parts[1].strip():
+				raise ValueError(f"header inválido {item!r}: esperado 'Nome: Valor'")
+			result[parts[0].strip()] = parts[1].strip()
+		return result
+	if isinstance(headers, dict):
+		for name, value in headers.items():
+			if not isinstance(name, str) or not name.strip() or not isinstance(value, str):
+				raise ValueError(f"header inválido {name!r}: nome e valor devem ser texto")
+		return dict(headers)
+	raise ValueError("'headers' deve ser um objeto ou uma lista 'Nome: Valor'")
+
+
+def compile_profile(raw: dict) -> Mapping:
+	"""Valida um perfil e o compila.
+
+	As opções aceitas são as chaves de PROFILE_DEFAULTS; as omitidas usam esses defaults
+	(os mesmos da CLI), então um perfil renderiza igual na CLI e na API.
+	"""
+	if not isinstance(raw, dict):
+		raise ValueError("Perfil deve ser um objeto com opções")
+	unknown = set(raw) - set(PROFILE_DEFAULTS)
+	if unknown:
+		raise ValueError(f"Opções desconhecidas: {', '.join(sorted(unknown))}")
+	options = {**PROFILE_DEFAULTS, **raw}
+	headers = _validate_profile_headers(options["headers"])
+	for key in ("viewport_width", "viewport_height", "timeout_ms"):
+		value = options[key]
+		if not isinstance(value, int) or isinstance(value, bool) or value <= 0:
+			raise ValueError(f"'{key}' deve ser um inteiro positivo")
+	if not isinstance(options["post_wait_ms"], int) or isinstance(options["post_wait_ms"], bool) or options["post_wait_ms"] < 0:
+		raise ValueError("'post_wait_ms' deve ser um inteiro não negativo")
+	for key in ("landscape", "headless"):
+		if not isinstance(options[key], bool):
+			raise ValueError(f"'{key}' deve ser true ou false")
+	for key in ("user_agent", "accept_language", "timezone_id", "proxy"):
+		if options[key] is not None and not isinstance(options[key], str):
+			raise ValueError(f"'{key}' deve ser texto ou null")
+	if options["wait_until"] not in WAIT_UNTIL_CHOICES:
+		raise ValueError(f"'wait_until' deve ser um de: {', '.join(WAIT_UNTIL_CHOICES)}")
+	if options["pdf_format"] not in PDF_FORMATS:
+		raise ValueError(f"'pdf_format' deve ser um de: {', '.join(PDF_FORMATS)}")
+	scale = options["scale"]
+	if isinstance(scale, bool) or not isinstance(scale, (int, float)) or not 0.1 <= scale <= 2.0:
+		raise ValueError("'scale' deve ser um número entre 0.1 e 2.0")
+	return compile_render_options(
+		viewport_width=options["viewport_width"],
+		viewport_height=options["viewport_height"],
+		wait_until=options["wait_until"],
+		timeout_ms=options["timeout_ms"],
+		pdf_format=options["pdf_format"],
+		landscape=options["landscape"],
+		scale=float(scale),
+		user_agent=options["user_agent"],
+		accept_language=options["accept_language"],
+		timezone_id=options["timezone_id"],
+		extra_headers=headers,
+		headless=options["headless"],
+		proxy=options["proxy"],
+		post_wait_ms=options["post_wait_ms"],
+	)
+
+
+def load_render_profiles(file_path: Path) -> dict[str, Mapping]:
+	"""Lê um arquivo de perfis (JSON, ou YAML se PyYAML estiver instalado) e compila cada perfil.
+
+	Erros de leitura levantam OSError; de sintaxe ou validação, ValueError.
+	"""
+	if not file_path.exists():
+		raise FileNotFoundError(f"Arquivo não encontrado: {file_path}")
+	text = file_path.read_text(encoding="utf-8")
+	if file_path.suffix.lower() in (".yaml", ".yml"):
+		try:
+			import yaml
+		except ImportError:
+			raise ValueError("Perfis em YAML exigem PyYAML (pip install pyyaml)") from None
+		try:
+			data = yaml.safe_load(text)
+		except yaml.YAMLError as exc:
+			raise ValueError(f"{file_path}: YAML inválido: {exc}") from None
+	else:
+		try:
+			data = json.loads(text)
+		except json.JSONDecodeError as exc:
+			raise ValueError(f"{file_path}: JSON inválido: {exc}") from None
+	if not isinstance(data, dict):
+		raise ValueError(f"{file_path}: esperado um objeto id -> opções")
+	profiles: dict[str, Mapping] = {}
+	for profile_id, raw in data.items():
+		try:
+			profiles[str(profile_id)] = compile_profile(raw)
+		except ValueError as exc:
+			raise ValueError(f"Perfil '{profile_id}' inválido: {exc}") from None
+	return profiles
+
+
+def get_render_profile(profiles: Mapping, profile_id: str) -> Mapping:
+	"""Retorna o perfil compilado (ver load_render_profiles); LookupError se o id não existir"""
+	if profile_id not in profiles:
+		raise LookupError(f"Perfil desconhecido: {profile_id}")
+	return profiles[profile_id]
+
+
+def apply_profile_overrides(profile: Mapping, overrides: dict) -> Mapping:
+	"""Aplica opções explícitas (None = não informada) sobre um perfil compilado.
+
+	Sem diferenças, devolve o próprio perfil; caso contrário valida e compila de novo.
+	"""
+	changed = {key: value for key, value in overrides.items() if value is not None and profile["options"][key] != value}
+	if not changed:
+		return profile
+	return compile_profile({**_thaw(profile["options"]), **changed})
+
+
+_REDACTED = "***"
+
+
+def list_render_profiles(profiles: Mapping) -> dict[str, dict]:
+	"""Retorna id -> opções normalizadas dos perfis.
+
+	Proxy e valores de headers (credenciais, tokens) são mascarados.
+	"""
+	listed: dict[str, dict] = {}
+	for profile_id, profile in profiles.items():
+		options = _thaw(profile["options"])
+		if options["proxy"]:
+			options["proxy"] = _REDACTED
+		options["headers"] = {name: _REDACTED for name in options["headers"]}
+		listed[profile_id] = options
+	return listed
+
+
+def _sync_playwright():
+	from playwright.sync_api import sync_playwright
+
+	return sync_playwright()
+
+
+def _launch_kwargs(headless: bool, proxy: Optional[str]) -> dict:
+	launch_kwargs: dict = {"headless": headless}
+	if proxy:
+		launch_kwargs["proxy"] = {"server": proxy}
+	return launch_kwargs
+
+
+def warm_up_browser(headless: bool = True, browser_endpoint: Optional[str] = None) -> float:
+	"""Importa o Playwright e abre/fecha o Chromium uma vez, aquecendo o cache de disco.
+
+	Com browser_endpoint, apenas conecta e desconecta do navegador compartilhado.
+	Retorna o tempo gasto em segundos.
+	"""
+	start = time.perf_counter()
+	with _sync_playwright() as p:
+		if browser_endpoint:
+			browser = p.chromium.connect_over_cdp(browser_endpoint)
+		else:
+			browser = p.chromium.launch(headless=headless)
+		browser.close()
+	return time.perf_counter() - start
+
+
+def _page_slots_dir(host: str, port: int) -> Path:
+	# Um diretório de vagas por host:porta, para não misturar navegadores compartilhados diferentes
+	host = host.lower()
+	if host == "localhost":
+		host = "127.0.0.1"
+	return Path(tempfile.gettempdir()) / "print_url_page_slots" / sanitize_for_filename(f"{host}_{port}")
+
+
+def _endpoint_slots_dir(browser_endpoint: str) -> Path:
+	from urllib.parse import urlparse
+
+	parsed = urlparse(browser_endpoint)
+	port = parsed.port or (443 if parsed.scheme in ("https", "wss") else 80)
+	return _page_slots_dir(parsed.hostname or "127.0.0.1", port)
+
+
+def serve_browser(port: int, headless: bool = True, proxy: Optional[str] = None, host: str = "127.0.0.1", max_pages: int = 4) -> None:
+	"""Mantém um Chromium aberto com endpoint CDP para ser compartilhado entre processos.
+
+	Clientes (CLI ou workers do api.py) conectam via --browser-endpoint / BROWSER_ENDPOINT.
+	O limite de páginas abertas (max_pages) é definido aqui e lido pelos clientes locais.
+	Levanta RuntimeError se o Chromium for encerrado inesperadamente.
+	"""
+	from playwright.sync_api import Error as PlaywrightError
+
+	limit_file = ensure_output_dir(_page_slots_dir(host, port)) / "limit"
+	with _sync_playwright() as p:
+		launch_kwargs = _launch_kwargs(headless, proxy)
+		launch_kwargs["args"] = [
+			f"--remote-debugging-port={port}",
+			f"--remote-debugging-address={host}",
+		]
+		browser = p.chromium.launch(**launch_kwargs)
+		limit_file.write_text(str(max(1, max_pages)), encoding="utf-8")
+		print(f"Navegador compartilhado disponível em http://{host}:{port}, até {max(1, max_pages)} páginas (Ctrl+C para encerrar)")
+		# A API síncrona só processa eventos do driver durante chamadas do Playwright,
+		# então a espera é feita numa página auxiliar (time.sleep nunca veria a desconexão)
+		page = browser.new_page()
+		crashed = False
+		try:
+			while browser.is_connected():
+				page.wait_for_timeout(1000)
+			crashed = True
+		except KeyboardInterrupt:
+			pass
+		except PlaywrightError:
+			crashed = True
+		finally:
+			limit_file.unlink(missing_ok=True)
+			if browser.is_connected():
+				browser.close()
+	if crashed:
+		raise RuntimeError("O navegador compartilhado foi encerrado inesperadamente")
+
+
+def _shared_page_limit(browser_endpoint: str, max_pages: int) -> tuple[Path, int]:
+	"""Retorna (diretório de vagas, limite), preferindo o limite gravado por serve_browser.
+
+	max_pages só vale quando o navegador não foi iniciado por serve_browser nesta máquina.
+	"""
+	slots_dir = _endpoint_slots_dir(browser_endpoint)
+	try:
+		limit = int((slots_dir / "limit").read_text(encoding="utf-8").strip())
+	except (OSError, ValueError):
+		limit = max_pages
+	return slots_dir, max(1, limit)
+
+
+@contextmanager
+def _page_slot(browser_endpoint: str, max_pages: int, timeout_s: Optional[float] = None, poll_s: float = 0.2):
+	"""Reserva uma vaga de página do navegador compartilhado (ver _shared_page_limit).
+
+	As vagas são arquivos com lock exclusivo (flock), então o limite vale para
+	todos os processos da máquina. Sem fcntl (Windows), não há limite.
+	Levanta TimeoutError se nenhuma vaga for liberada em timeout_s segundos.
+	"""
+	try:
+		import fcntl
+	except ImportError:
+		yield
+		return
+	slots_dir, limit = _shared_page_limit(browser_endpoint, max_pages)
+	slots_dir = ensure_output_dir(slots_dir)
+	handles = [(slots_dir / f"slot{i}.lock").open("a") for i in range(limit)]
+	deadline = None if timeout_s is None else time.monotonic() + timeout_s
+	acquired = None
+	try:
+		while acquired is None:
+			for handle in handles:
+				try:
+					fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+				except BlockingIOError:
+					continue
+				acquired = handle
+				break
+			else:
+				if deadline is not None and time.monotonic() >= deadline:
+					raise TimeoutError(f"Nenhuma das {limit} vagas de página do navegador compartilhado foi liberada em {timeout_s}s")
+				time.sleep(poll_s)
+		yield
+	finally:
+		if acquired is not None:
+			fcntl.flock(acquired, fcntl.LOCK_UN)
+		for handle in handles:
+			handle.close()
+
+
+def capture_many(urls: list[tuple[str, Optional[str]]], output_dir: Path, base_prefix: str, viewport_width: int, viewport_height: int, wait_until: str, timeout_ms: int, pdf_format: str, landscape: bool, scale: float, user_agent: Optional[str], accept_language: Optional[str], timezone_id: Optional[str], extra_headers: dict[str, str], headless: bool, proxy: Optional[str], post_wait_ms: int, browser_endpoint: Optional[str] = None, max_pages: int = 4, slot_timeout_s: Optional[float] = None) -> list[tuple[str, Path, Path]]:
+	"""Captura screenshots e PDFs de múltiplas URLs, organizando por tipo (plataforma/aplicativo) se especificado.
+
+	Com browser_endpoint, usa o navegador compartilhado (ver serve_browser) em vez de abrir um
+	próprio, respeitando o limite de páginas abertas entre todos os processos (o definido por
+	serve_browser; max_pages é o fallback). Levanta TimeoutError se não houver vaga em slot_timeout_s.
+	"""
+	profile = compile_render_options(
+		viewport_width=viewport_width,
+		viewport_height=viewport_height,
+		wait_until=wait_until,
+		timeout_ms=timeout_ms,
+		pdf_format=pdf_format,
+		landscape=landscape,
+		scale=scale,
+		user_agent=user_agent,
+		accept_language=accept_language,
+		timezone_id=timezone_id,
+		extra_headers=extra_headers,
+		headless=headless,
+		proxy=proxy,
+		post_wait_ms=post_wait_ms,
+	)
+	return capture_with_profile(urls, output_dir, base_prefix, profile, browser_endpoint=browser_endpoint, max_pages=max_pages, slot_timeout_s=slot_timeout_s)
+
+
+def capture_with_profile(urls: list[tuple[str, Optional[str]]], output_dir: Path, base_prefix: str, profile: Mapping, browser_endpoint: Optional[str] = None, max_pages: int = 4, slot_timeout_s: Optional[float] = None) -> list[tuple[str, Path, Path]]:
+	"""Como capture_many, mas com opções já compiladas (compile_render_options / get_render_profile)"""
 	output_dir = ensure_output_dir(output_dir)
 	results: list[tuple[str, Path, Path]] = []
-	with sync_playwright() as p:
-		launch_kwargs: dict = {"headless": headless}
-		if proxy:
-			launch_kwargs["proxy"] = {"server": proxy}
-		browser = p.chromium.launch(**launch_kwargs)
-		# Headers padrão + extras
-		headers = dict(extra_headers)
-		if accept_language:
-			headers.setdefault("Accept-Language", accept_language)
-		context = browser.new_context(
-			viewport={"width": viewport_width, "height": viewport_height},
-			device_scale_factor=1,
-			user_agent=user_agent,
-			locale=_locale_from_accept_language(accept_language),
-			timezone_id=timezone_id,
-			extra_http_headers=headers or None,
-		)
-		page = context.new_page()
-		# Scripts simples para reduzir detecção automatizada
-		page.add_init_script(
-			"""
-			Object.defineProperty(navigator, 'webdriver', { get: () => undefined });
-			Object.defineProperty(navigator, 'languages', { get: () => ['pt-BR','pt','en-US','en'] });
-			Object.defineProperty(navigator, 'plugins', { get: () => [1,2,3,4,5] });
-			"""
-		)
-		for i, (url, tipo) in enumerate(urls):
-			# Determina o diretório de saída baseado no tipo
-			if tipo in ["plataforma", "aplicativo"]:
-				target_dir = ensure_output_dir(output_dir / tipo)
+	# A vaga é reservada antes de subir o driver e conectar: quem espera na fila não
+	# segura processo Node, conexão CDP nem contexto do navegador
+	with (_page_slot(browser_endpoint, max_pages, timeout_s=slot_timeout_s) if browser_endpoint else nullcontext()):
+		with _sync_playwright() as p:
+			context_kwargs = _thaw(profile["context_options"])
+			if browser_endpoint:
+				browser = p.chromium.connect_over_cdp(browser_endpoint)
+				# O proxy do navegador compartilhado é global; aqui vale só para este contexto
+				if profile["proxy"]:
+					context_kwargs["proxy"] = {"server": profile["proxy"]}
 			else:
-				target_dir = output_dir
-			
-			base_name = filename_for_url(base_prefix, url, i)
-			screenshot_path = target_dir / f"{base_name}.png"
-			pdf_path = target_dir / f"{base_name}.pdf"
-			response = page.goto(url, wait_until=wait_until, timeout=timeout_ms)
-			if post_wait_ms > 0:
-				page.wait_for_timeout(post_wait_ms)
-			page.screenshot(path=str(screenshot_path), full_page=True)
-			page.emulate_media(media="screen")
-			page.pdf(
-				path=str(pdf_path),
-				format=pdf_format,
-				print_background=True,
-				scale=scale,
-				landscape=landscape,
-			)
-			# Opcional: log simples de status HTTP
+				browser = p.chromium.launch(**_launch_kwargs(profile["headless"], profile["proxy"]))
+			context = browser.new_context(**context_kwargs)
+			context.add_init_script(_STEALTH_INIT_SCRIPT)
 			try:
-				status = response.status if response else None
-				if status and status >= 400:
-					print(f"Aviso: status HTTP {status} para {url}", file=sys.stderr)
-			except Exception:
-				pass
-			results.append((url, screenshot_path, pdf_path))
-		context.close()
-		browser.close()
+				_capture_pages(context, urls, output_dir, base_prefix, profile["capture"], results)
+			finally:
+				context.close()
+				# Em modo compartilhado, close() apenas desconecta; o navegador continua no ar
+				browser.close()
 	return results
 
+def _capture_pages(context, urls: list[tuple[str, Optional[str]]], output_dir: Path, base_prefix: str, capture: Mapping, results: list[tuple[str, Path, Path]]) -> None:
+	page = context.new_page()
+	for i, (url, tipo) in enumerate(urls):
+		# Determina o diretório de saída baseado no tipo
+		if tipo in ["plataforma", "aplicativo"]:
+			target_dir = ensure_output_dir(output_dir / tipo)
+		else:
+			target_dir = output_dir
+		
+		base_name = filename_for_url(base_prefix, url, i)
+		screenshot_path = target_dir / f"{base_name}.png"
+		pdf_path = target_dir / f"{base_name}.pdf"
+		response = page.goto(url, wait_until=capture["wait_until"], timeout=capture["timeout_ms"])
+		if capture["post_wait_ms"] > 0:
+			page.wait_for_timeout(capture["post_wait_ms"])
+		page.screenshot(path=str(screenshot_path), full_page=True)
+		page.emulate_media(media="screen")
+		page.pdf(
+			path=str(pdf_path),
+			format=capture["pdf_format"],
+			print_background=True,
+			scale=capture["scale"],
+			landscape=capture["landscape"],
+		)
+		# Opcional: log simples de status HTTP
+		try:
+			status = response.status if response else None
+			if status and status >= 400:
+				print(f"Aviso: status HTTP {status} para {url}", file=sys.stderr)
+		except Exception:
+			pass
+		results.append((url, screenshot_path, pdf_path))
+
 
 def main() -> None:
 	args = parse_args()
+	if args.serve_browser:
+		try:
+			serve_browser(args.browser_port, headless=(not args.headful), proxy=args.proxy, max_pages=args.max_pages)
+		except Exception as exc:  # noqa: BLE001 - propósito é reportar erro ao usuário
+			print(f"Erro no navegador compartilhado: {exc}", file=sys.stderr)
+			sys.exit(1)
+		return
 	base_prefix = generate_base_prefix(args.base_name)
 	try:
 		urls = gather_urls(args.urls, args.urls_file, args.csv_col, args.delimiter)
-		extra_headers = _parse_headers(args.headers)
-		results = capture_many(
-			urls=urls,
-			output_dir=args.output_dir,
-			base_prefix=base_prefix,
-			viewport_width=args.viewport_width,
-			viewport_height=args.viewport_height,
-			wait_until=args.wait_until,
-			timeout_ms=args.timeout_ms,
-			pdf_format=args.pdf_format,
-			landscape=args.landscape,
-			scale=args.scale,
-			user_agent=args.user_agent,
-			accept_language=args.accept_language,
-			timezone_id=args.timezone_id,
-			extra_headers=extra_headers,
-			headless=(not args.headful),
-			proxy=args.proxy,
-			post_wait_ms=args.post_wait_ms,
-		)
+		if args.profile:
+			if args.profiles_file is None:
+				raise ValueError("--profile exige --profiles-file")
+			profile = get_render_profile(load_render_profiles(args.profiles_file), args.profile)
+			results = capture_with_profile(
+				urls,
+				args.output_dir,
+				base_prefix,
+				profile,
+				browser_endpoint=args.browser_endpoint,
+				max_pages=args.max_pages,
+				slot_timeout_s=args.slot_timeout_s,
+			)
+		else:
+			results = capture_many(
+				urls=urls,
+				output_dir=args.output_dir,
+				base_prefix=base_prefix,
+				viewport_width=args.viewport_width,
+				viewport_height=args.viewport_height,
+				wait_until=args.wait_until,
+				timeout_ms=args.timeout_ms,
+				pdf_format=args.pdf_format,
+				landscape=args.landscape,
+				scale=args.scale,
+				user_agent=args.user_agent,
+				accept_language=args.accept_language,
+				timezone_id=args.timezone_id,
+				extra_headers=_parse_headers(args.headers),
+				headless=(not args.headful),
+				proxy=args.proxy,
+				post_wait_ms=args.post_wait_ms,
+				browser_endpoint=args.browser_endpoint,
+				max_pages=args.max_pages,
+				slot_timeout_s=args.slot_timeout_s,
+			)
 		for url, screenshot_file, pdf_file in results:
 			print(f"URL: {url}")
 			print(f"  Screenshot salvo em: {screenshot_file}")